@@ -6,32 +6,88 @@ providers (Moonshot, MiniMax) with automatic failover on 429/5xx errors.
 Streams SSE responses transparently.
 """
 
+import atexit
+import http.client
 import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
+import re
+import select
+import signal
+import socket
 import sys
-from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from itertools import groupby
 from pathlib import Path
 from urllib.parse import urlparse
 
-import urllib.request
-import urllib.error
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
 
 CONFIG_DIR = Path(__file__).resolve().parent
 CONFIG_PATH = CONFIG_DIR / "config.json"
 ENV_PATH = CONFIG_DIR / ".env"
 LOG_PATH = CONFIG_DIR / "proxy.log"
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_PATH, encoding="utf-8"),
-        logging.StreamHandler(sys.stdout),
-    ],
-)
+# Request threads only enqueue log records; a single listener thread does the
+# file and console I/O so logging never serializes the request path.
+_log_handlers = [
+    logging.FileHandler(LOG_PATH, encoding="utf-8"),
+    logging.StreamHandler(sys.stdout),
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+_log_queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+_log_listener = None
+
+
+def _start_log_listener() -> None:
+    """Start the thread draining the log queue."""
+    global _log_listener
+    _log_listener = logging.handlers.QueueListener(_log_queue_handler.queue, *_log_handlers)
+    _log_listener.start()
+
+
+def _stop_log_listener() -> None:
+    """Stop the listener thread once it has written every queued record."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+def _start_log_listener_in_child() -> None:
+    # The parent's queue was drained before the fork; a forked worker gets
+    # its own queue so it never shares lock state with the parent's.
+    _log_queue_handler.queue = queue.SimpleQueue()
+    _start_log_listener()
+
+
+_start_log_listener()
+atexit.register(_stop_log_listener)
+if hasattr(os, "register_at_fork"):
+    # No listener thread may be running across fork(): a thread holding a
+    # handler's stream lock at that moment would deadlock the child's logging.
+    os.register_at_fork(
+        before=_stop_log_listener,
+        after_in_parent=_start_log_listener,
+        after_in_child=_start_log_listener_in_child,
+    )
+
 log = logging.getLogger("claude-proxy")
+log.setLevel(logging.INFO)
+log.addHandler(_log_queue_handler)
+log.propagate = False
 
 
 def load_env(path: Path) -> None:
@@ -68,7 +124,356 @@ if os.environ.get("CLAUDE_PROVIDERS"):
     PROVIDERS = [p for p in PROVIDERS if p["name"] in preferred]
 
 PROXY_PORT = CONFIG.get("proxy_port", 8787)
+WORKERS = CONFIG.get("workers", 1)  # >1 forks processes sharing the port (POSIX only)
+MAX_INFLIGHT = CONFIG.get("max_inflight", 128)  # concurrent upstream requests, per worker process
 MAX_BODY_SIZE = 10 * 1024 * 1024  # 10MB limit to prevent memory exhaustion
+UPSTREAM_TIMEOUT = 300
+POOL_MAXSIZE = 32  # idle keep-alive connections kept per provider
+UPLOAD_BLOCKSIZE = 64 * 1024
+RELAY_CHUNK_SIZE = 64 * 1024
+STREAM_UPLOAD_MIN = 1024 * 1024  # bodies above this are piped, not buffered, when failover is impossible
+COMPRESS_MIN = 1024  # smaller bodies are not worth a Content-Encoding
+ZSTD_LEVEL = 3
+
+# Failover backoff: full jitter between attempts, capped. RETRY_BUDGET bounds the
+# total time a request spends sleeping between attempts, not the attempts
+# themselves, so every healthy provider is still tried once.
+RETRY_BASE = 0.25
+RETRY_CAP = 4.0
+RETRY_BUDGET = 30.0
+COOLDOWN_MAX = CONFIG.get("cooldown_minutes", 30) * 60  # upper bound on honoring Retry-After
+
+# Adaptive routing: providers are tried in order of rolling failure rate, then
+# rolling time-to-headers, and a provider whose failure rate crosses the
+# threshold is skipped ("circuit open") for CIRCUIT_OPEN_SECONDS. The failure
+# rate also halves every ERR_RATE_HALF_LIFE seconds without a failure, so a
+# provider that is no longer being tried still earns its place back.
+EWMA_ALPHA = 0.1
+ERR_RATE_BUCKET = 0.1  # failure rates this close are treated as equal when ordering
+ERR_RATE_HALF_LIFE = 30.0
+CIRCUIT_ERROR_THRESHOLD = 0.5
+CIRCUIT_OPEN_SECONDS = 30.0
+
+# Provider name -> {"ewma_ms" (None until the first success), "err_rate"
+# (as of "last_failure"), "last_failure" and "open_until" (time.monotonic())}
+STATS = {
+    p["name"]: {"ewma_ms": None, "err_rate": 0.0, "last_failure": 0.0, "open_until": 0.0}
+    for p in PROVIDERS
+}
+_stats_lock = threading.Lock()
+
+# Backpressure: once MAX_INFLIGHT requests are in flight, new ones wait briefly
+# and are then turned away with 503 instead of piling up sockets and buffers.
+UPSTREAM_SEM = threading.BoundedSemaphore(MAX_INFLIGHT)
+INFLIGHT_WAIT = 1.0
+
+# Headers that describe a single connection and must not be relayed as-is
+HOP_BY_HOP_REQ = frozenset({"host", "authorization", "connection", "proxy-connection", "keep-alive"})
+HOP_BY_HOP_RESP = frozenset({
+    "transfer-encoding", "connection", "keep-alive", "proxy-authenticate",
+    "proxy-authorization", "te", "trailer", "upgrade",
+})
+
+# Matches a top-level-looking `"stream": true` without decoding the JSON body
+STREAM_RE = re.compile(rb'"stream"\s*:\s*true')
+
+
+def _retry_after_seconds(value: str | None) -> float | None:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _err_rate(stats: dict, now: float) -> float:
+    """The provider's failure rate, decayed for the time since its last failure."""
+    return stats["err_rate"] * 0.5 ** ((now - stats["last_failure"]) / ERR_RATE_HALF_LIFE)
+
+
+def _record_success(name: str, elapsed_ms: float) -> None:
+    with _stats_lock:
+        stats = STATS[name]
+        if stats["ewma_ms"] is None:
+            stats["ewma_ms"] = elapsed_ms
+        else:
+            stats["ewma_ms"] = (1 - EWMA_ALPHA) * stats["ewma_ms"] + EWMA_ALPHA * elapsed_ms
+        stats["err_rate"] = (1 - EWMA_ALPHA) * stats["err_rate"]
+
+
+def _provider_order(contexts: list["ProviderContext"], now: float) -> list["ProviderContext"]:
+    """Failover order: open circuits last, then by failure rate, then by latency.
+
+    Latency only reorders providers that have been measured; unmeasured ones
+    keep their config position. A working provider is thus never displaced
+    just to probe another, and one that has only ever failed gets its place
+    back once its failure rate has decayed.
+    """
+    health, latency = {}, {}
+    for ctx in contexts:
+        stats = STATS[ctx.name]
+        health[ctx.name] = (stats["open_until"] > now, round(_err_rate(stats, now) / ERR_RATE_BUCKET))
+        latency[ctx.name] = stats["ewma_ms"]
+
+    order = []
+    ranked = sorted(contexts, key=lambda c: health[c.name])
+    for _, group in groupby(ranked, key=lambda c: health[c.name]):
+        group = list(group)
+        measured = iter(sorted((c for c in group if latency[c.name] is not None),
+                               key=lambda c: latency[c.name]))
+        order += [c if latency[c.name] is None else next(measured) for c in group]
+    return order
+
+
+def _record_failure(name: str, retry_after: float | None = None) -> None:
+    """Count a failed attempt; open the circuit on a failure spike or Retry-After."""
+    now = time.monotonic()
+    with _stats_lock:
+        stats = STATS[name]
+        stats["err_rate"] = (1 - EWMA_ALPHA) * _err_rate(stats, now) + EWMA_ALPHA
+        stats["last_failure"] = now
+        open_for = 0.0
+        if stats["err_rate"] > CIRCUIT_ERROR_THRESHOLD:
+            open_for = CIRCUIT_OPEN_SECONDS
+        if retry_after:
+            open_for = max(open_for, min(retry_after, COOLDOWN_MAX))
+        if open_for and now + open_for > stats["open_until"]:
+            stats["open_until"] = now + open_for
+            log.warning("%s disabled for %.0fs (error rate %.2f)", name, open_for, stats["err_rate"])
+
+
+# (host, port) -> getaddrinfo() results. Upstream connections resolve through
+# this cache and a daemon thread refreshes it, so no request waits on DNS.
+DNS_REFRESH_SECONDS = 60.0
+_dns_cache: dict[tuple[str, int], list] = {}
+
+
+def _resolve(host: str, port: int) -> list:
+    addrs = _dns_cache.get((host, port))
+    if addrs is None:
+        addrs = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        _dns_cache[(host, port)] = addrs
+    return addrs
+
+
+def _refresh_dns() -> None:
+    while True:
+        time.sleep(DNS_REFRESH_SECONDS)
+        for host, port in list(_dns_cache):
+            try:
+                _dns_cache[(host, port)] = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+            except OSError as e:
+                log.warning("DNS refresh for %s failed, keeping cached addresses: %s", host, e)
+
+
+def _create_connection(address, timeout, source_address=None, **kwargs):
+    """socket.create_connection() replacement that resolves via _dns_cache.
+
+    Only the TCP connect uses the cached IP; HTTPSConnection still wraps the
+    socket with server_hostname set to the provider's host name, so SNI and
+    certificate checks are unchanged.
+    """
+    host, port = address
+    err = None
+    for family, type_, proto, _, sockaddr in _resolve(host, port):
+        sock = socket.socket(family, type_, proto)
+        try:
+            sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            err = e
+            sock.close()
+    # Every cached address failed; resolve afresh next time
+    _dns_cache.pop((host, port), None)
+    raise err or OSError(f"getaddrinfo returned no addresses for {host}")
+
+
+# A reused socket that fails this soon after the request was written was
+# already dead; later failures are real upstream errors and are not replayed.
+STALE_RESPONSE_WINDOW = 1.0
+
+
+class StaleConnectionError(ConnectionError):
+    """A reused keep-alive connection had been closed by the server."""
+
+
+def _is_connection_dropped(conn: http.client.HTTPConnection) -> bool:
+    """True if an idle keep-alive socket was closed by the server.
+
+    An idle connection should have nothing to read; readability means EOF
+    (or unexpected data), so the socket cannot carry another request.
+    """
+    if conn.sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+class ConnectionPool:
+    """Idle keep-alive connections to one provider, reused across requests.
+
+    Reusing a connection skips the TCP and TLS handshakes, which otherwise
+    cost several round trips on every proxied call.
+    """
+
+    def __init__(self, base_url: str, maxsize: int = POOL_MAXSIZE):
+        parsed = urlparse(base_url)
+        self.host = parsed.netloc
+        if parsed.scheme == "https":
+            self.conn_class = http.client.HTTPSConnection
+        else:
+            self.conn_class = http.client.HTTPConnection
+        self.address = (parsed.hostname, parsed.port or self.conn_class.default_port)
+        self._idle = queue.LifoQueue(maxsize)
+
+    def _new(self) -> http.client.HTTPConnection:
+        conn = self.conn_class(self.host, timeout=UPSTREAM_TIMEOUT, blocksize=UPLOAD_BLOCKSIZE)
+        conn._create_connection = _create_connection
+        return conn
+
+    def get(self) -> http.client.HTTPConnection:
+        """Take an idle connection, discarding any the server closed while idle."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._new()
+            if not _is_connection_dropped(conn):
+                return conn
+            conn.close()
+
+    def send(self, method: str, path: str, body, headers: dict, fresh: bool = False):
+        """Send a request and return (conn, resp), closing conn on failure.
+
+        Raises StaleConnectionError when a reused keep-alive socket turns out
+        to have been closed by the server: the write itself failed, or the
+        response failed within STALE_RESPONSE_WINDOW of it. Anything later is
+        a real upstream failure and is raised as-is. fresh=True skips the pool.
+        """
+        conn = self._new() if fresh else self.get()
+        reused = conn.sock is not None
+        try:
+            conn.request(method, path, body=body, headers=headers)
+        except (ConnectionResetError, BrokenPipeError) as e:
+            conn.close()
+            if reused:
+                raise StaleConnectionError(f"pooled connection was closed: {e}") from e
+            raise
+        except Exception:
+            conn.close()
+            raise
+
+        written = time.monotonic()
+        try:
+            return conn, conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError) as e:
+            conn.close()
+            if reused and time.monotonic() - written < STALE_RESPONSE_WINDOW:
+                raise StaleConnectionError(f"pooled connection was closed: {e}") from e
+            raise
+        except Exception:
+            conn.close()
+            raise
+
+    def release(self, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse) -> None:
+        """Return conn to the pool if resp was fully read and the server keeps it open."""
+        if not resp.isclosed() or resp.will_close:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+class IncompleteUploadError(ConnectionError):
+    """The client closed its connection before sending the whole request body."""
+
+
+class LimitedReader:
+    """File-like view over the next `length` bytes of the client's request stream.
+
+    Passed to http.client as a request body so the upload is relayed in
+    blocks without ever holding the whole body in memory.
+    """
+
+    def __init__(self, fp, length: int):
+        self._fp = fp
+        self.remaining = length
+
+    def read(self, n: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if n < 0 or n > self.remaining:
+            n = self.remaining
+        data = self._fp.read(n)
+        if not data:
+            # Returning b"" would end the upload early and leave the upstream
+            # waiting for the rest of the declared Content-Length.
+            raise IncompleteUploadError(f"client closed the connection {self.remaining} bytes short")
+        self.remaining -= len(data)
+        return data
+
+
+@dataclass(frozen=True)
+class ProviderContext:
+    """Per-provider request state that never changes after startup."""
+
+    name: str
+    base_path: str  # path prefix prepended to the client's request path
+    host: str
+    auth: str  # ready-made Authorization header value
+    pool: ConnectionPool
+    encoding: str | None  # request Content-Encoding the provider accepts, if any
+
+
+def _build_provider_contexts(providers: list[dict]) -> list[ProviderContext]:
+    contexts = []
+    for provider in providers:
+        api_key = os.environ.get(provider["api_key_env"], "")
+        if not api_key:
+            log.warning("No API key for %s (env: %s), skipping", provider["name"], provider["api_key_env"])
+            continue
+        encoding = provider.get("encoding")
+        if encoding is not None and (encoding != "zstd" or zstd is None):
+            log.warning("%s: request encoding %r is not available, sending bodies uncompressed",
+                        provider["name"], encoding)
+            encoding = None
+        parsed = urlparse(provider["base_url"])
+        contexts.append(ProviderContext(
+            name=provider["name"],
+            base_path=parsed.path.rstrip("/"),
+            host=parsed.netloc,
+            auth=f"Bearer {api_key}",
+            pool=ConnectionPool(provider["base_url"]),
+            encoding=encoding,
+        ))
+    return contexts
+
+
+PROVIDER_CTX = _build_provider_contexts(PROVIDERS)
+
+# The provider list is fixed at startup, so the whole health response
+# (status line, headers and body) is built once and sent with one write
+HEALTH_BODY = json.dumps({"status": "ok", "providers": [p["name"] for p in PROVIDERS]}).encode()
+_HEALTH_HEAD = (
+    b"%s 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+    % (BaseHTTPRequestHandler.protocol_version.encode(), len(HEALTH_BODY))
+)
+HEALTH_RESPONSE = _HEALTH_HEAD + HEALTH_BODY
 
 
 class ProxyHandler(BaseHTTPRequestHandler):
@@ -81,10 +486,7 @@ class ProxyHandler(BaseHTTPRequestHandler):
     def do_GET(self):
         """Handle GET requests (health check)."""
         if self.path == "/health":
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"status": "ok", "providers": [p["name"] for p in PROVIDERS]}).encode())
+            self.wfile.write(HEALTH_RESPONSE)
             return
         self._proxy_request()
 
@@ -92,9 +494,70 @@ class ProxyHandler(BaseHTTPRequestHandler):
         """Handle POST requests (main API calls)."""
         self._proxy_request()
 
+    def _read_body(self, content_length: int) -> bytearray | None:
+        """Read exactly content_length bytes into a single preallocated buffer.
+
+        Returns None if the client closed the connection before sending them all.
+        """
+        buf = bytearray(content_length)
+        view = memoryview(buf)
+        received = 0
+        while received < content_length:
+            n = self.rfile.readinto(view[received:])
+            if not n:
+                break
+            received += n
+        view.release()
+        if received < content_length:
+            return None
+        return buf
+
+    def _write_head(self, status: int, headers) -> None:
+        """Write the status line and relayed upstream headers in a single write.
+
+        Bypasses send_response()/send_header(), which would also add a second
+        Server and Date header on top of the upstream's own.
+        """
+        reason = self.responses.get(status, ("",))[0]
+        head = [f"{self.protocol_version} {status} {reason}\r\n"]
+        head += [f"{k}: {v}\r\n" for k, v in headers if k.lower() not in HOP_BY_HOP_RESP]
+        head.append("\r\n")
+        self.wfile.write("".join(head).encode("latin-1"))
+
+    def _relay_body(self, resp: http.client.HTTPResponse) -> None:
+        """Copy a non-streaming response body through one reusable buffer.
+
+        Upstreams are always TLS, so the kernel cannot splice/sendfile the
+        bytes; readinto() at least avoids allocating a new bytes per block.
+        """
+        buf = bytearray(RELAY_CHUNK_SIZE)
+        view = memoryview(buf)
+        while n := resp.readinto(view):
+            self.wfile.write(view[:n])
+
+    def _log_request(self, ctx: ProviderContext, status: int, started: float) -> None:
+        """Emit the single summary line for a request served by ctx."""
+        log.info(
+            "%s %s -> %s %d in %.1fms",
+            self.command, self.path, ctx.name, status, (time.monotonic() - started) * 1000,
+        )
+
     def _proxy_request(self):
+        started = time.monotonic()
         # Read request body with size limit
-        content_length = int(self.headers.get("Content-Length", 0))
+        try:
+            content_length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            content_length = -1
+        if content_length < 0:
+            self.send_response(400)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(json.dumps({
+                "type": "error",
+                "error": {"type": "invalid_request_error", "message": "Invalid Content-Length header"}
+            }).encode())
+            return
         if content_length > MAX_BODY_SIZE:
             self.send_response(413)
             self.send_header("Content-Type", "application/json")
@@ -105,98 +568,160 @@ class ProxyHandler(BaseHTTPRequestHandler):
             }).encode())
             return
 
-        body = self.rfile.read(content_length) if content_length > 0 else b""
-
-        # Determine if client wants streaming
-        is_streaming = False
-        if body:
-            try:
-                req_json = json.loads(body)
-                is_streaming = req_json.get("stream", False)
-            except (json.JSONDecodeError, UnicodeDecodeError):
-                pass
+        if not UPSTREAM_SEM.acquire(timeout=INFLIGHT_WAIT):
+            log.warning("%d requests in flight, rejecting %s %s", MAX_INFLIGHT, self.command, self.path)
+            self.send_response(503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(json.dumps({
+                "type": "error",
+                "error": {"type": "overloaded_error", "message": "Proxy is at its concurrency limit"},
+            }).encode())
+            return
+        try:
+            self._forward_request(content_length, started)
+        finally:
+            UPSTREAM_SEM.release()
+
+    def _forward_request(self, content_length: int, started: float):
+        # Clients asking for SSE usually say so in Accept; only scan the body
+        # when that hint is missing.
+        is_streaming = "text/event-stream" in self.headers.get("Accept", "")
+
+        if len(PROVIDER_CTX) == 1 and content_length > STREAM_UPLOAD_MIN:
+            # A single provider leaves nothing to fail over to, so the body
+            # never needs replaying: pipe it upstream instead of buffering it.
+            body = LimitedReader(self.rfile, content_length)
+        else:
+            body = self._read_body(content_length)
+            if body is None:
+                # Forwarding a truncated body with the client's Content-Length
+                # would leave the upstream waiting for bytes that never come.
+                log.warning("Client closed the connection mid-body, dropping %s %s", self.command, self.path)
+                self.close_connection = True
+                return
+            # The "stream" key can sit after a large "messages" array, so scan
+            # the whole buffer rather than parse it.
+            if not is_streaming:
+                is_streaming = STREAM_RE.search(body) is not None
 
         last_error = None
 
-        for provider in PROVIDERS:
-            api_key = os.environ.get(provider["api_key_env"], "")
-            if not api_key:
-                log.warning("No API key for %s (env: %s), skipping", provider["name"], provider["api_key_env"])
+        # Build headers once - forward everything except host, authorization and
+        # hop-by-hop headers (the upstream leg is pooled). The per-provider keys
+        # below are overwritten on every attempt.
+        fwd_headers = {k: v for k, v in self.headers.items() if k.lower() not in HOP_BY_HOP_REQ}
+
+        # Compressed once, on first use, for providers that accept zstd bodies
+        can_compress = (
+            isinstance(body, bytearray) and len(body) > COMPRESS_MIN
+            and "content-encoding" not in (k.lower() for k in fwd_headers)
+        )
+        zstd_body = None
+
+        backoff_left = RETRY_BUDGET
+        attempt = 0
+
+        for ctx in _provider_order(PROVIDER_CTX, time.monotonic()):
+            if STATS[ctx.name]["open_until"] > time.monotonic():
+                log.debug("%s circuit is open, skipping", ctx.name)
+                last_error = last_error or (503, f"{ctx.name} is temporarily disabled")
                 continue
 
-            target_url = provider["base_url"].rstrip("/") + self.path
-            log.info("Trying %s: %s %s", provider["name"], self.command, target_url)
-
-            # Build headers - forward everything except host and authorization
-            fwd_headers = {}
-            for key, value in self.headers.items():
-                lower = key.lower()
-                if lower in ("host", "authorization"):
-                    continue
-                fwd_headers[key] = value
-
-            fwd_headers["Authorization"] = f"Bearer {api_key}"
-            fwd_headers["Host"] = urlparse(provider["base_url"]).netloc
-
+            # Back off before each failover so overloaded upstreams shed load
+            # instead of receiving a synchronized burst of retries.
+            if attempt and backoff_left > 0:
+                delay = min(backoff_left, random.uniform(0, min(RETRY_CAP, RETRY_BASE * 2 ** (attempt - 1))))
+                backoff_left -= delay
+                time.sleep(delay)
+            attempt += 1
+
+            fwd_headers["Authorization"] = ctx.auth
+            fwd_headers["Host"] = ctx.host
+            fwd_headers["Connection"] = "keep-alive"
+
+            send_body, send_headers = body, fwd_headers
+            if ctx.encoding == "zstd" and can_compress:
+                if zstd_body is None:
+                    zstd_body = zstd.compress(body, level=ZSTD_LEVEL)
+                send_body = zstd_body
+                send_headers = {k: v for k, v in fwd_headers.items() if k.lower() != "content-length"}
+                send_headers["Content-Encoding"] = "zstd"
+                send_headers["Content-Length"] = str(len(zstd_body))
+
+            pool = ctx.pool
+            sent = time.monotonic()
+            args = (self.command, ctx.base_path + self.path, send_body if send_body else None, send_headers)
             try:
-                req = urllib.request.Request(
-                    target_url,
-                    data=body if body else None,
-                    headers=fwd_headers,
-                    method=self.command,
-                )
-
-                resp = urllib.request.urlopen(req, timeout=300)
+                try:
+                    # A piped body cannot be replayed, so it never risks a stale
+                    # pooled socket; one extra handshake is nothing next to the upload.
+                    conn, resp = pool.send(*args, fresh=hasattr(send_body, "read"))
+                except StaleConnectionError as e:
+                    # A dead pooled socket says nothing about the provider itself:
+                    # replay once on a fresh connection, without counting a failure
+                    # or spending a failover attempt.
+                    log.warning("%s: %s — retrying on a fresh connection", ctx.name, e)
+                    sent = time.monotonic()
+                    conn, resp = pool.send(*args, fresh=True)
                 status = resp.status
-                resp_headers = dict(resp.getheaders())
-
-            except urllib.error.HTTPError as e:
-                status = e.code
-                if status in (429, 500, 502, 503, 504):
-                    error_body = e.read().decode("utf-8", errors="replace")[:500]
-                    log.warning(
-                        "%s returned %d: %s — trying next provider",
-                        provider["name"], status, error_body,
-                    )
-                    last_error = (status, error_body)
-                    continue
-                else:
-                    # Non-retriable error — forward it to the client as-is
-                    log.info("%s returned %d (non-retriable), forwarding to client", provider["name"], status)
-                    self.send_response(status)
-                    for hdr_key, hdr_val in e.headers.items():
-                        if hdr_key.lower() not in ("transfer-encoding", "connection"):
-                            self.send_header(hdr_key, hdr_val)
-                    self.end_headers()
-                    self.wfile.write(e.read())
-                    return
 
+            except IncompleteUploadError as e:
+                log.warning("%s, dropping %s %s", e, self.command, self.path)
+                self.close_connection = True
+                return
             except Exception as e:
-                log.warning("%s connection error: %s — trying next provider", provider["name"], e)
+                _record_failure(ctx.name)
+                log.warning("%s connection error: %s — trying next provider", ctx.name, e)
                 last_error = (502, str(e))
                 continue
 
+            if status in (429, 500, 502, 503, 504):
+                error_body = resp.read().decode("utf-8", errors="replace")[:500]
+                pool.release(conn, resp)
+                _record_failure(ctx.name, _retry_after_seconds(resp.getheader("Retry-After")))
+                log.warning(
+                    "%s returned %d: %s — trying next provider",
+                    ctx.name, status, error_body,
+                )
+                last_error = (status, error_body)
+                continue
+
+            # Only a real answer is a latency sample: a provider rejecting our
+            # key replies fast but must not be ranked ahead of working ones.
+            # Other 4xx are the client's fault and say nothing about the provider.
+            if status < 400:
+                _record_success(ctx.name, (time.monotonic() - sent) * 1000)
+            elif status in (401, 403):
+                _record_failure(ctx.name)
+
+            if status >= 400:
+                # Non-retriable error — forward it to the client as-is
+                self._write_head(status, resp.getheaders())
+                self.wfile.write(resp.read())
+                pool.release(conn, resp)
+                self._log_request(ctx, status, started)
+                return
+
             # Success — stream the response back to the client
-            log.info("%s responded %d — streaming to client", provider["name"], status)
-            self.send_response(status)
-            for hdr_key, hdr_val in resp_headers.items():
-                if hdr_key.lower() in ("transfer-encoding", "connection"):
-                    continue
-                self.send_header(hdr_key, hdr_val)
-            self.end_headers()
+            self._write_head(status, resp.getheaders())
 
-            # Stream chunks
+            # Relay the body. SSE must reach the client event by event, so read1()
+            # returns whatever has arrived instead of waiting for a full chunk.
+            # Anything else is copied in large blocks through a reused buffer.
+            content_type = resp.getheader("Content-Type", "")
             try:
-                while True:
-                    chunk = resp.read(4096)
-                    if not chunk:
-                        break
-                    self.wfile.write(chunk)
-                    self.wfile.flush()
+                if is_streaming or content_type.startswith("text/event-stream"):
+                    for chunk in iter(lambda: resp.read1(RELAY_CHUNK_SIZE), b""):
+                        self.wfile.write(chunk)
+                else:
+                    self._relay_body(resp)
             except (BrokenPipeError, ConnectionResetError):
                 log.info("Client disconnected during streaming")
             finally:
-                resp.close()
+                pool.release(conn, resp)
+            self._log_request(ctx, status, started)
             return
 
         # All providers failed
@@ -215,16 +740,83 @@ class ProxyHandler(BaseHTTPRequestHandler):
         }).encode())
 
 
+class ProxyServer(ThreadingHTTPServer):
+    """Thread-per-connection server that can share its port with sibling workers."""
+
+    daemon_threads = True
+
+    def server_bind(self):
+        # With SO_REUSEPORT each worker binds its own socket and the kernel
+        # load-balances new connections across them.
+        if WORKERS > 1 and hasattr(socket, "SO_REUSEPORT"):
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def _fork_workers(count: int) -> list[int]:
+    """Fork count - 1 extra workers. Returns child pids in the parent, [] in a child."""
+    children = []
+    for _ in range(count - 1):
+        pid = os.fork()
+        if pid == 0:
+            return []
+        children.append(pid)
+    return children
+
+
 def main():
     active_providers = [p["name"] for p in PROVIDERS]
     log.info("Fallback proxy listening on http://127.0.0.1:%d", PROXY_PORT)
     log.info("Providers: %s", ", ".join(active_providers))
-    server = HTTPServer(("127.0.0.1", PROXY_PORT), ProxyHandler)
+
+    children = []
+    if WORKERS > 1:
+        if hasattr(os, "fork") and hasattr(socket, "SO_REUSEPORT"):
+            log.info("Starting %d worker processes", WORKERS)
+            children = _fork_workers(WORKERS)
+        else:
+            log.warning("workers=%d ignored: needs os.fork and SO_REUSEPORT", WORKERS)
+
+    # Resolve provider hosts up front (per worker, after forking) and keep
+    # the cache fresh in the background.
+    for ctx in PROVIDER_CTX:
+        try:
+            _resolve(*ctx.pool.address)
+        except OSError as e:
+            log.warning("Could not resolve %s: %s", ctx.pool.address[0], e)
+    threading.Thread(target=_refresh_dns, name="dns-refresh", daemon=True).start()
+
+    # One thread per connection: requests spend nearly all their time waiting
+    # on upstream I/O, so a slow provider must not block other clients.
+    server = ProxyServer(("127.0.0.1", PROXY_PORT), ProxyHandler)
+
+    if children:
+        # Without this, SIGTERM kills only the parent and the workers keep
+        # serving the shared port with the old config. shutdown() blocks until
+        # serve_forever() returns, so it must run off the main thread.
+        def _on_sigterm(signum, frame):
+            log.info("Proxy shutting down")
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, _on_sigterm)
+
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         log.info("Proxy shutting down")
         server.shutdown()
+    finally:
+        server.server_close()
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
 
 
 if __name__ == "__main__":